@@ -1,20 +1,26 @@
+import functools
+import os
 from environs import Env
 
-env = Env()
-env.read_env()
-
-# Environment variables
-E2B_API_KEY = env("E2B_API_KEY")
-ANTHROPIC_API_KEY = env("ANTHROPIC_API_KEY")
 LANGCHAIN_PROJECT = "e2b-pptx"
 E2B_TEMPLATE_ID = "dpqrnnze53ej8u1pu2p1"
- 
-# Set environment variables
-import os
-os.environ["E2B_API_KEY"] = E2B_API_KEY
-os.environ["ANTHROPIC_API_KEY"] = ANTHROPIC_API_KEY
-os.environ["LANGCHAIN_PROJECT"] = LANGCHAIN_PROJECT
-os.environ["E2B_TEMPLATE_ID"] = E2B_TEMPLATE_ID
 
 # Constants
-OUTPUT_DIR = "generated_presentations"
\ No newline at end of file
+OUTPUT_DIR = "generated_presentations"
+
+@functools.lru_cache(maxsize=1)
+def load_env() -> Env:
+    """Load .env and export required settings once per process."""
+    env = Env()
+    env.read_env()
+
+    # Validate required keys; read_env() has already exported them from .env
+    env("E2B_API_KEY")
+    env("ANTHROPIC_API_KEY")
+
+    # Set environment variables without clobbering values from the shell
+    if "LANGCHAIN_PROJECT" not in os.environ:
+        os.environ["LANGCHAIN_PROJECT"] = LANGCHAIN_PROJECT
+    if "E2B_TEMPLATE_ID" not in os.environ:
+        os.environ["E2B_TEMPLATE_ID"] = E2B_TEMPLATE_ID
+    return env
@@ -20,7 +20,8 @@ def create_agent():
     llm = ChatAnthropic(
         model="claude-sonnet-4-20250514",
         temperature=0,
-        max_tokens=4000
+        max_tokens=4000,
+        streaming=True
     )
     
     # Create tools list
@@ -2,9 +2,11 @@ import streamlit as st
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import numba
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class SectorAnalysis:
     def __init__(self):
@@ -41,56 +43,104 @@ class SectorAnalysis:
         self.show_performance = st.sidebar.checkbox("Show Performance", True)
         self.show_volatility = st.sidebar.checkbox("Show Volatility", True)
 
-@st.cache_data
-def fetch_sector_data(tickers, period):
-    """Fetch data for entire sector"""
-    data = pd.DataFrame()
-    stock_info = {}
-    
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        # Get historical data
-        hist = stock.history(period=period)['Close']
-        data[ticker] = hist
-        # Get stock info
-        stock_info[ticker] = {
-            'marketCap': stock.info.get('marketCap', 0),
-            'peRatio': stock.info.get('peRatio', 0),
-            'forwardPE': stock.info.get('forwardPE', 0),
-            'dividendYield': stock.info.get('dividendYield', 0),
-            'beta': stock.info.get('beta', 0),
-            'volume': stock.info.get('volume', 0)
+@st.cache_data(ttl=60*5)
+def fetch_prices(tickers, period):
+    """Fetch close prices for entire sector"""
+    # One batched request for the price history of every ticker
+    prices = yf.download(
+        " ".join(tickers),
+        period=period,
+        progress=False,
+        group_by='ticker',
+        auto_adjust=True,
+        threads=True
+    )
+    return prices.xs('Close', axis=1, level=1)[list(tickers)]
+
+@st.cache_data(ttl=60*60*24)
+def fetch_stock_info(tickers):
+    """Fetch fundamentals for entire sector"""
+    def _fetch_info(ticker):
+        # Bind .info once; each access may trigger a scrape
+        raw_info = yf.Ticker(ticker).info
+        info = {
+            'marketCap': raw_info.get('marketCap', 0),
+            'peRatio': raw_info.get('peRatio', 0),
+            'forwardPE': raw_info.get('forwardPE', 0),
+            'dividendYield': raw_info.get('dividendYield', 0),
+            'beta': raw_info.get('beta', 0),
+            'volume': raw_info.get('volume', 0)
         }
+        return ticker, info
     
-    return data, stock_info
+    # .info has no batch endpoint, so fetch it concurrently per ticker
+    with ThreadPoolExecutor(max_workers=min(len(tickers), 16)) as executor:
+        futures = [executor.submit(_fetch_info, ticker) for ticker in tickers]
+        results = dict(future.result() for future in as_completed(futures))
+    
+    return {t: results[t] for t in tickers}
+
+@numba.guvectorize(
+    [(numba.float64[:], numba.float64[:], numba.float64[:], numba.float64[:])],
+    '(n)->(),(),()',
+    nopython=True,
+    cache=True
+)
+def _return_stats(r, mean, std, sharpe):
+    """Mean, sample std and annualized Sharpe of one return series in one pass"""
+    n = 0
+    s = 0.0
+    s2 = 0.0
+    for x in r:
+        if not np.isnan(x):
+            n += 1
+            s += x
+            s2 += x * x
+    mean[0] = s / n if n > 0 else np.nan
+    std[0] = np.sqrt(max((s2 - s * s / n) / (n - 1), 0.0)) if n > 1 else np.nan
+    sharpe[0] = (mean[0] * 252 - 0.02) / (std[0] * np.sqrt(252))
 
-def calculate_sector_metrics(data, stock_info):
+def calculate_sector_metrics(returns, stock_info):
     """Calculate key sector metrics"""
-    returns = data.pct_change()
+    # Fused reduction over each ticker's returns (one row per ticker)
+    mu, sd, sharpe = _return_stats(returns.values.T)
+    vol = sd * np.sqrt(252)
     
-    metrics = {
-        'daily_returns': returns.mean(),
-        'volatility': returns.std() * np.sqrt(252),
-        'sharpe': (returns.mean() * 252 - 0.02) / (returns.std() * np.sqrt(252)),
-        'beta': pd.Series({ticker: info['beta'] for ticker, info in stock_info.items()}),
-        'market_cap': pd.Series({ticker: info['marketCap']/1e9 for ticker, info in stock_info.items()}),
-        'pe_ratio': pd.Series({ticker: info['peRatio'] for ticker, info in stock_info.items()}),
-    }
+    # Extract the info-derived columns in a single pass
+    tickers = list(stock_info)
+    beta = np.empty(len(tickers))
+    market_cap = np.empty(len(tickers))
+    pe_ratio = np.empty(len(tickers))
+    for i, ticker in enumerate(tickers):
+        info = stock_info[ticker]
+        beta[i] = info['beta']
+        market_cap[i] = info['marketCap'] / 1e9
+        pe_ratio[i] = info['peRatio']
+    
+    metrics = pd.DataFrame({
+        'daily_returns': pd.Series(mu, index=returns.columns),
+        'volatility': pd.Series(vol, index=returns.columns),
+        'sharpe': pd.Series(sharpe, index=returns.columns),
+        'beta': pd.Series(beta, index=tickers),
+        'market_cap': pd.Series(market_cap, index=tickers),
+        'pe_ratio': pd.Series(pe_ratio, index=tickers),
+    })
     
     return metrics
 
 def create_performance_chart(data):
     """Create relative performance chart"""
-    normalized = data / data.iloc[0] * 100
+    arr = data.values
+    scaled = np.empty_like(arr, dtype=float)
+    np.divide(arr, arr[0], out=scaled)
+    scaled *= 100
+    normalized = pd.DataFrame(scaled, index=data.index, columns=data.columns)
     
-    fig = go.Figure()
-    for col in normalized.columns:
-        fig.add_trace(go.Scatter(
-            x=normalized.index,
-            y=normalized[col],
-            name=col,
-            mode='lines'
-        ))
+    fig = px.line(
+        normalized,
+        labels={'value': 'Normalized Price (%)', 'index': 'Date'},
+        render_mode='webgl'
+    )
     
     fig.update_layout(
         title="Relative Performance",
@@ -100,15 +150,51 @@ def create_performance_chart(data):
     
     return fig
 
+numba.set_num_threads(min(8, numba.config.NUMBA_NUM_THREADS))
+
+# Explicit signature compiles eagerly at import (or loads from cache), so the
+# first volatility plot doesn't pay the JIT cost
+@numba.njit("float32[:,:](float32[:,:], int64)", cache=True, fastmath=True, parallel=True)
+def rolling_std_2d(arr, window):
+    """Rolling sample standard deviation of each column, O(1) per step"""
+    n_rows, n_cols = arr.shape
+    # Accumulate in float64 for stability, store in the input precision
+    out = np.full((n_rows, n_cols), np.nan, dtype=arr.dtype)
+    for j in numba.prange(n_cols):
+        s = 0.0
+        s2 = 0.0
+        for i in range(n_rows):
+            x = arr[i, j]
+            s += x
+            s2 += x * x
+            if i >= window:
+                old = arr[i - window, j]
+                s -= old
+                s2 -= old * old
+            if i >= window - 1:
+                n = window
+                var = (s2 - s * s / n) / (n - 1)
+                out[i, j] = np.sqrt(max(var, 0.0))
+    return out
+
 def create_volatility_surface(returns):
-    """Create volatility surface"""
-    rolling_vol = returns.rolling(window=20).std() * np.sqrt(252) * 100
+    """Create volatility surface, or None if there is too little history"""
+    if len(returns) < 25 or returns.shape[1] < 2:
+        return None
+    
+    # Visualization only: float32 halves memory traffic and the JSON payload
+    returns_f32 = returns.values.astype(np.float32, copy=False)
+    rolling_vol_f32 = rolling_std_2d(returns_f32, 20) * np.float32(np.sqrt(252) * 100)
+    
+    # Drop the warm-up rows where every window is still incomplete
+    valid = ~np.isnan(rolling_vol_f32).all(axis=1)
+    rolling_vol_f32 = rolling_vol_f32[valid]
     
     fig = go.Figure(data=[
         go.Surface(
-            z=rolling_vol.values.T,
-            x=rolling_vol.index,
-            y=rolling_vol.columns,
+            z=rolling_vol_f32.T,
+            x=returns.index[valid],
+            y=returns.columns,
             colorscale='Viridis'
         )
     ])
@@ -165,14 +251,17 @@ class SectorApp:
         st.title(f"{self.analyzer.selected_sector} Sector Analysis")
         
         try:
-            # Fetch data
-            data, stock_info = fetch_sector_data(
-                self.analyzer.sectors[self.analyzer.selected_sector],
-                self.analyzer.period
-            )
+            # Fetch data (prices and fundamentals are cached separately)
+            tickers = tuple(self.analyzer.sectors[self.analyzer.selected_sector])
+            data = fetch_prices(tickers, self.analyzer.period)
+            stock_info = fetch_stock_info(tickers)
+            
+            # Compute returns once and share them across the views
+            returns = data.pct_change()
+            returns_clean = returns.dropna()
             
             # Calculate metrics
-            metrics = calculate_sector_metrics(data, stock_info)
+            metrics = calculate_sector_metrics(returns, stock_info)
             
             # Display sector overview
             st.subheader("Sector Overview")
@@ -221,23 +310,35 @@ class SectorApp:
             # Volatility Analysis
             if self.analyzer.show_volatility:
                 st.subheader("Volatility Analysis")
-                vol_fig = create_volatility_surface(data.pct_change().dropna())
-                st.plotly_chart(vol_fig, use_container_width=True)
+                vol_fig = create_volatility_surface(returns_clean)
+                if vol_fig is None:
+                    st.info("Insufficient history for volatility surface")
+                else:
+                    st.plotly_chart(vol_fig, use_container_width=True)
             
             # Correlation Analysis
             st.subheader("Correlation Analysis")
-            corr_matrix = data.pct_change().corr().round(2)
+            R = np.corrcoef(returns_clean.values, rowvar=False).round(2)
+            corr_matrix = pd.DataFrame(R, index=returns_clean.columns, columns=returns_clean.columns)
+            
+            # Cell annotations only stay readable (and cheap) for small matrices
+            text_kwargs = {}
+            if corr_matrix.shape[0] <= 12:
+                text_kwargs = dict(
+                    text=[[f"{v:.2f}" for v in row] for row in corr_matrix.values],
+                    texttemplate='%{text}',
+                    textfont={"size": 10}
+                )
             
             fig = go.Figure(data=go.Heatmap(
                 z=corr_matrix,
                 x=corr_matrix.columns,
                 y=corr_matrix.columns,
-                text=corr_matrix.values,
-                texttemplate='%{text:.2f}',
-                textfont={"size": 10},
                 colorscale='RdBu_r',
+                zsmooth=False,
                 zmin=-1,
-                zmax=1
+                zmax=1,
+                **text_kwargs
             ))
             
             fig.update_layout(
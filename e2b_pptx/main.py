@@ -1,8 +1,11 @@
 import os
-from config.settings import OUTPUT_DIR
+from config.settings import OUTPUT_DIR, load_env
 from ui.streamlit_app import init_streamlit_app
 
 def main():
+    # Load environment settings (cached across Streamlit reruns)
+    load_env()
+    
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
@@ -0,0 +1,23 @@
+"""Vectorized indicator helpers for generated dashboards.
+
+This file is copied next to each locally launched Streamlit app and registered
+as a module in the Pyodide sandbox, so generated code can
+`from _indicators import sliding_weighted_ma`. Keep it numpy-only.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def sliding_weighted_ma(x, weights):
+    """Weighted moving average over every full window of `x`.
+
+    `weights` are normalized to sum to 1 and `weights[-1]` applies to the newest
+    value in each window. The result has the same length as `x`, NaN-padded for
+    the first len(weights) - 1 points so it can be assigned to a DataFrame column.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] >= weights.shape[0]:
+        out[weights.shape[0] - 1:] = sliding_window_view(x, weights.shape[0]) @ weights
+    return out
@@ -0,0 +1,115 @@
+"""Child side of the presentation worker pool.
+
+Started as `python -m tools._pptx_worker`, so the child imports this stdlib-only
+module and the libraries presentation scripts use, never the app itself. Jobs
+and replies are length-prefixed pickles on the process's stdin/stdout.
+"""
+import contextlib
+import io
+import os
+import pickle
+import struct
+import sys
+import traceback
+
+_HEADER = struct.Struct(">Q")
+
+
+def send_msg(f, obj) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(_HEADER.pack(len(data)))
+    f.write(data)
+    f.flush()
+
+
+def _read_exact(f, n: int):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = f.read(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_msg(f):
+    """Read one message from `f`; None if the stream ends first."""
+    header = _read_exact(f, _HEADER.size)
+    if header is None:
+        return None
+    data = _read_exact(f, _HEADER.unpack(header)[0])
+    return None if data is None else pickle.loads(data)
+
+
+class BoundedWriter(io.TextIOBase):
+    """Text stream that keeps at most `limit` UTF-8 bytes and counts the rest."""
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._buf = bytearray()
+        self._dropped = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        data = s.encode("utf-8", errors="replace")
+        room = self._limit - len(self._buf)
+        if room > 0:
+            self._buf += data[:room]
+        self._dropped += max(0, len(data) - max(room, 0))
+        return len(s)
+
+    def getvalue(self) -> str:
+        text = self._buf.decode("utf-8", errors="replace")
+        if self._dropped:
+            text += f"\n... [truncated {self._dropped} bytes]"
+        return text
+
+
+def _preload() -> None:
+    # Pay for the heavy imports while the process waits for its script
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401
+        import pptx  # noqa: F401
+    except Exception:
+        pass
+
+
+def main() -> None:
+    """Run one script received on stdin and write back (stdout, stderr)."""
+    # Keep the protocol on private copies of fds 0/1; the script and anything
+    # it starts read from devnull and write to stderr instead
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+
+    _preload()
+    job = recv_msg(proto_in)
+    if job is None:
+        return
+    code, script_path, cwd, max_output_bytes = job
+
+    stdout, stderr = BoundedWriter(max_output_bytes), BoundedWriter(max_output_bytes)
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            os.chdir(cwd)
+            exec(compile(code, script_path, "exec"), {"__name__": "__main__", "__file__": script_path})
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                print(f"SystemExit: {e.code}", file=sys.stderr)
+        except BaseException as e:
+            # Skip this frame so the traceback starts at the script
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+
+    send_msg(proto_out, (stdout.getvalue(), stderr.getvalue()))
+    proto_out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,111 @@
+import atexit
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
-from typing import Dict, Any, List
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
 from pydantic import BaseModel
 from langchain_core.tools import tool
 from config.settings import OUTPUT_DIR
+from tools import _pptx_worker
+
+# Cap on captured stdout/stderr kept per run, enforced inside the worker
+MAX_OUTPUT_BYTES = 1024 * 1024
+# Hard limit for a single presentation script
+EXEC_TIMEOUT = 300
+# Warm interpreters kept ready; each one runs a single script and then exits
+WARM_WORKERS = 2
+
+# A plain interpreter running only the worker module: multiprocessing's spawn
+# would re-import the app's __main__ (main.py under `streamlit run`) in every worker
+_WORKER_CMD = [sys.executable, "-m", "tools._pptx_worker"]
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class _PresentationPool:
+    """Pool of pre-started python processes that run presentation scripts.
+
+    Each worker imports python-pptx ahead of time, runs exactly one script and
+    exits, so scripts run concurrently and never share interpreter state. A
+    replacement is started as soon as a worker is taken. Nothing is spawned
+    until the first run.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._lock = threading.Lock()
+        self._idle = []  # Popen objects waiting for a script
+        atexit.register(self.close)
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(_WORKER_CMD, cwd=_PROJECT_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def _acquire(self) -> subprocess.Popen:
+        with self._lock:
+            while self._idle:
+                proc = self._idle.pop()
+                if proc.poll() is None:
+                    break
+                self._discard(proc)
+            else:
+                proc = self._spawn()
+            # Top the pool back up while this script runs
+            while len(self._idle) < self._size:
+                self._idle.append(self._spawn())
+        return proc
+
+    @staticmethod
+    def _discard(proc: subprocess.Popen, grace: float = 1) -> None:
+        for stream in (proc.stdin, proc.stdout):
+            try:
+                stream.close()  # EOF on stdin tells an idle worker to exit
+            except OSError:
+                pass
+        try:
+            proc.wait(grace)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def run(self, code: str, script_path: str, cwd: str, timeout: float = EXEC_TIMEOUT) -> Tuple[str, str]:
+        proc = self._acquire()
+        timed_out = threading.Event()
+
+        def _expire():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(timeout, _expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            _pptx_worker.send_msg(proc.stdin, (code, script_path, cwd, MAX_OUTPUT_BYTES))
+            reply = _pptx_worker.recv_msg(proc.stdout)
+        except OSError as e:
+            reply, error = None, e
+        else:
+            error = None
+        finally:
+            watchdog.cancel()
+            # The worker exits on its own after replying; kill it if a script left it hanging
+            self._discard(proc)
+
+        if timed_out.is_set():
+            return "", f"Execution timed out after {timeout} seconds"
+        if reply is None:
+            reason = repr(error) if error else f"exit code {proc.returncode}"
+            return "", f"Presentation worker crashed: {reason}"
+        return reply
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for proc in idle:
+            self._discard(proc)
+
+_POOL = _PresentationPool(WARM_WORKERS)
 
 class PresentationInput(BaseModel):
     code: str
@@ -14,9 +114,9 @@ class PresentationInput(BaseModel):
 def create_presentation(code: str) -> Dict[str, Any]:
     """Execute provided Python code locally to create PowerPoint presentations.
 
-    This replaces E2B sandbox execution with a local subprocess run. Any occurrences
-    of '/home/user' in the provided code are rewritten to a temporary working
-    directory to avoid OS-specific path issues.
+    This replaces E2B sandbox execution with a local run in a pre-started worker
+    process. Any occurrences of '/home/user' in the provided code are rewritten
+    to a temporary working directory to avoid OS-specific path issues.
     """
     # Prepare working directories
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -37,29 +137,21 @@ def create_presentation(code: str) -> Dict[str, Any]:
         with open(script_path, "w", encoding="utf-8") as f:
             f.write(adjusted_code)
 
-        # Execute the script in a subprocess
-        completed = subprocess.run(
-            ["python", script_path],
-            cwd=home_user_dir,
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        stdout_text = completed.stdout or ""
-        stderr_text = completed.stderr or ""
+        # Execute the script in a warm worker interpreter
+        stdout_text, stderr_text = _POOL.run(adjusted_code, script_path, home_user_dir)
 
         # Discover generated .pptx files under the working directory
-        generated_files: List[str] = []
-        for root, _dirs, files in os.walk(temp_root_dir):
-            for file_name in files:
-                if file_name.lower().endswith(".pptx"):
-                    generated_files.append(os.path.join(root, file_name))
+        generated_files = list(Path(temp_root_dir).rglob("*.[pP][pP][tT][xX]"))
 
-        # Copy found files into OUTPUT_DIR for Streamlit download
+        # Move found files into OUTPUT_DIR for Streamlit download. The temp dir
+        # is removed afterwards, so a rename is enough; copy only across devices.
         for src_path in generated_files:
             try:
-                dest_path = os.path.join(OUTPUT_DIR, os.path.basename(src_path))
-                shutil.copy2(src_path, dest_path)
+                dest_path = os.path.join(OUTPUT_DIR, src_path.name)
+                try:
+                    os.replace(src_path, dest_path)
+                except OSError:
+                    shutil.copy2(src_path, dest_path)
                 pptx_local_paths.append(dest_path)
             except Exception as copy_err:
                 if stderr_text:
@@ -1,25 +1,40 @@
 from environs import Env
-from langsmith import expect
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union, Dict, TypedDict
-from langchain_anthropic import ChatAnthropic
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Union, TypedDict
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
+from langchain_anthropic import ChatAnthropic
+import functools
+import hashlib
 import logging
 from dotenv import load_dotenv
 import time
-import json
 import os
+import random
+import re
 import socket
 import tempfile
+import shutil
 import subprocess
 import asyncio
-from langchain_sandbox import PyodideSandbox
+import atexit
+import heapq
 import threading
 import signal
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
+try:
+    from asyncio import timeout as async_timeout  # Python 3.11+
+except ImportError:
+    try:
+        from async_timeout import timeout as async_timeout
+    except ImportError:
+        async_timeout = None
+
 load_dotenv()
 
 # Configure logging
@@ -57,12 +72,113 @@ from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 from scipy.stats import norm
 
-@st.cache_data
+# One PCG64 generator for the whole app; draw in bulk, never per sample
+_rng = np.random.default_rng()
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    # numba is optional: run the helpers as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def _rolling_mean_std_njit(x, w):
+    """Rolling mean and sample std in one O(N) pass (sliding Welford)"""
+    n = len(x)
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        if i < w:
+            delta = x[i] - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x[i] - mean)
+        else:
+            old = x[i - w]
+            new_mean = mean + (x[i] - old) / w
+            m2 += (x[i] - old) * (x[i] - new_mean + old - mean)
+            mean = new_mean
+        if i >= w - 1:
+            mean_out[i] = mean
+            std_out[i] = np.sqrt(max(m2 / (w - 1), 0.0))
+    return mean_out, std_out
+
+def _rolling_mean_std_numpy(x, w):
+    """Rolling mean and sample std without numba: E[X^2] - E[X]^2 via convolve"""
+    n = len(x)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < w:
+        return mean, std
+    kernel = np.ones(w)
+    s = np.convolve(x, kernel, 'valid')
+    s2 = np.convolve(x * x, kernel, 'valid')
+    mean[w - 1:] = s / w
+    std[w - 1:] = np.sqrt(np.maximum((s2 - s * s / w) / (w - 1), 0.0))
+    return mean, std
+
+@njit(cache=True)
+def _rsi_njit(close, period=14):
+    """Wilder's RSI in a single pass"""
+    n = len(close)
+    rsi = np.full(n, np.nan)
+    if n <= period:
+        return rsi
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        avg_gain += max(delta, 0.0)
+        avg_loss += max(-delta, 0.0)
+    avg_gain /= period
+    avg_loss /= period
+    for i in range(period, n):
+        if i > period:
+            delta = close[i] - close[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(delta, 0.0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-delta, 0.0)) / period
+        rsi[i] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    return rsi
+
+def _rsi_numpy(close, period=14):
+    """Wilder's RSI without numba (vectorized ewm smoothing)"""
+    rsi = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return rsi
+    delta = np.diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # Seed with the simple average, then smooth with alpha = 1/period
+    gain[period - 1] = gain[:period].mean()
+    loss[period - 1] = loss[:period].mean()
+    avg_gain = pd.Series(gain[period - 1:]).ewm(alpha=1/period, adjust=False).mean().to_numpy()
+    avg_loss = pd.Series(loss[period - 1:]).ewm(alpha=1/period, adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[period:] = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return rsi
+
+_rolling_mean_std = _rolling_mean_std_njit if HAVE_NUMBA else _rolling_mean_std_numpy
+_rsi = _rsi_njit if HAVE_NUMBA else _rsi_numpy
+
+@st.cache_data(ttl=300)
 def load_stock_data(symbol: str, period: str):
-    """Cached function to load stock data"""
+    """Cached function to load stock data and its daily returns"""
     stock = yf.Ticker(symbol)
-    data = stock.history(period=period)
-    return data, stock.info
+    # float32 is plenty for prices and halves memory traffic; Volume stays int64
+    # because float32 cannot represent large share counts exactly
+    data = stock.history(period=period).astype({
+        'Open': 'float32', 'High': 'float32', 'Low': 'float32',
+        'Close': 'float32', 'Volume': 'int64'
+    })
+    close = data['Close'].to_numpy()
+    returns = np.diff(close) / close[:-1]
+    return data, stock.info, returns
 
 class FinancialAnalyticsDashboard:
     def __init__(self):
@@ -90,22 +206,21 @@ class FinancialAnalyticsDashboard:
         self.show_monte_carlo = st.sidebar.checkbox("Monte Carlo Simulation", True)
         
     def calculate_technical_indicators(self, data):
-        # Moving averages
-        data['SMA_20'] = data['Close'].rolling(window=20).mean()
-        data['SMA_50'] = data['Close'].rolling(window=50).mean()
-        data['SMA_200'] = data['Close'].rolling(window=200).mean()
+        close = data['Close'].to_numpy(dtype=np.float64)
         
-        # Bollinger Bands
-        data['BB_middle'] = data['Close'].rolling(window=20).mean()
-        data['BB_upper'] = data['BB_middle'] + 2*data['Close'].rolling(window=20).std()
-        data['BB_lower'] = data['BB_middle'] - 2*data['Close'].rolling(window=20).std()
+        # Moving averages (one O(N) pass per window)
+        sma_20, std_20 = _rolling_mean_std(close, 20)
+        data['SMA_20'] = sma_20
+        data['SMA_50'] = _rolling_mean_std(close, 50)[0]
+        data['SMA_200'] = _rolling_mean_std(close, 200)[0]
         
-        # RSI
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
+        # Bollinger Bands (reuse the 20-day mean and std)
+        data['BB_middle'] = sma_20
+        data['BB_upper'] = sma_20 + 2*std_20
+        data['BB_lower'] = sma_20 - 2*std_20
+        
+        # RSI (Wilder's smoothing)
+        data['RSI'] = _rsi(close)
         
         return data
         
@@ -145,12 +260,13 @@ class FinancialAnalyticsDashboard:
         fig.update_layout(height=800, title_text="Technical Analysis")
         return fig
         
-    def calculate_volatility(self, data):
-        # Daily Returns
-        data['Returns'] = data['Close'].pct_change()
+    def calculate_volatility(self, data, returns):
+        # Daily Returns (precomputed; the first day has none)
+        data['Returns'] = np.concatenate([[np.nan], returns])
         
         # Historical Volatility (20-day)
-        data['Volatility'] = data['Returns'].rolling(window=20).std() * np.sqrt(252)
+        _, vol_20 = _rolling_mean_std(returns, 20)
+        data['Volatility'] = np.concatenate([[np.nan], vol_20]) * np.sqrt(252)
         
         return data
         
@@ -166,44 +282,50 @@ class FinancialAnalyticsDashboard:
                          height=400)
         return fig
         
-    def calculate_var(self, data, confidence_level=0.95):
-        returns = data['Returns'].dropna()
-        var = np.percentile(returns, (1-confidence_level)*100)
-        cvar = returns[returns <= var].mean()
+    def calculate_var(self, returns, confidence_level=0.95):
+        arr = returns[~np.isnan(returns)]
+        if arr.size == 0:
+            return {'VaR': np.nan, 'CVaR': np.nan}
+        # O(N) selection instead of a full sort; the tail is a contiguous slice.
+        # Same rank convention as the Monte Carlo bounds below
+        k = int((1-confidence_level)*(arr.size-1))
+        part = np.partition(arr, k)
         
         return {
-            'VaR': var,
-            'CVaR': cvar
+            'VaR': part[k],
+            'CVaR': part[:k+1].mean()
         }
         
-    def monte_carlo_simulation(self, data, simulations=1000, days=252):
-        returns = data['Returns'].dropna()
-        mu = returns.mean()
-        sigma = returns.std()
+    def monte_carlo_simulation(self, data, returns, simulations=1000, days=252):
+        mu = np.nanmean(returns)
+        sigma = np.nanstd(returns, ddof=1)
         
-        sim_results = []
         last_price = data['Close'].iloc[-1]
         
-        for _ in range(simulations):
-            prices = [last_price]
-            for _ in range(days):
-                prices.append(prices[-1] * np.exp(np.random.normal(mu, sigma)))
-            sim_results.append(prices)
+        # Draw every path at once: (simulations, days) log-returns
+        shocks = _rng.standard_normal((simulations, days))
+        log_rets = mu + sigma * shocks
+        paths = last_price * np.exp(np.cumsum(log_rets, axis=1))
+        sim_results = np.concatenate([np.full((simulations, 1), last_price), paths], axis=1)
             
-        return np.array(sim_results)
+        return sim_results
         
     def plot_monte_carlo(self, simulations):
         fig = go.Figure()
         
-        for sim in simulations[:100]:  # Plot first 100 simulations
-            fig.add_trace(go.Scatter(y=sim, mode='lines',
-                                   line=dict(width=0.5, color='blue'),
-                                   opacity=0.1,
-                                   showlegend=False))
+        # Plot first 100 simulations as ONE NaN-separated WebGL trace
+        n = min(100, len(simulations))
+        steps = simulations.shape[1]
+        ys = np.hstack([simulations[:n], np.full((n, 1), np.nan)]).ravel()
+        xs = np.tile(np.append(np.arange(steps), np.nan), n)
+        fig.add_trace(go.Scattergl(x=xs, y=ys, mode='lines',
+                                 line=dict(width=0.5, color='rgba(0,0,255,0.1)'),
+                                 hoverinfo='skip',
+                                 showlegend=False))
             
-        fig.add_trace(go.Scatter(y=simulations.mean(axis=0),
-                                name='Average',
-                                line=dict(color='red', width=2)))
+        fig.add_trace(go.Scattergl(y=simulations.mean(axis=0),
+                                  name='Average',
+                                  line=dict(color='red', width=2)))
                                 
         fig.update_layout(title='Monte Carlo Simulation (1 Year Forecast)',
                          yaxis_title='Stock Price',
@@ -215,14 +337,15 @@ class FinancialAnalyticsDashboard:
         
         try:
             # Use the cached function instead of the class method
-            data, info = load_stock_data(self.symbol, self.period)
+            # Returns are computed once there and reused by every section
+            data, info, returns = load_stock_data(self.symbol, self.period)
             
             # Current Stats
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric("Current Price", 
                          f"${data['Close'].iloc[-1]:.2f}",
-                         f"{data['Close'].pct_change().iloc[-1]:.2%}")
+                         f"{returns[-1]:.2%}")
             with col2:
                 st.metric("Volume",
                          f"{data['Volume'].iloc[-1]:,.0f}")
@@ -241,13 +364,13 @@ class FinancialAnalyticsDashboard:
                 
             # Volatility Analysis
             if self.show_volatility:
-                data = self.calculate_volatility(data)
+                data = self.calculate_volatility(data, returns)
                 st.plotly_chart(self.plot_volatility(data),
                               use_container_width=True)
                 
             # Value at Risk
             if self.show_var:
-                var_metrics = self.calculate_var(data)
+                var_metrics = self.calculate_var(returns)
                 st.subheader("Value at Risk Analysis (95% Confidence)")
                 col1, col2 = st.columns(2)
                 with col1:
@@ -258,12 +381,16 @@ class FinancialAnalyticsDashboard:
             # Monte Carlo Simulation
             if self.show_monte_carlo:
                 st.subheader("Monte Carlo Simulation")
-                simulations = self.monte_carlo_simulation(data)
+                simulations = self.monte_carlo_simulation(data, returns)
                 st.plotly_chart(self.plot_monte_carlo(simulations),
                               use_container_width=True)
                 
                 # Simulation Statistics
                 final_prices = simulations[:, -1]
+                # One partition yields both confidence bounds
+                k_lo = int(0.05 * (final_prices.size - 1))
+                k_hi = int(0.95 * (final_prices.size - 1))
+                bounds = np.partition(final_prices, [k_lo, k_hi])
                 st.write("Simulation Results (1 Year Forecast):")
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -271,10 +398,10 @@ class FinancialAnalyticsDashboard:
                              f"${np.mean(final_prices):.2f}")
                 with col2:
                     st.metric("95% Confidence Upper Bound",
-                             f"${np.percentile(final_prices, 95):.2f}")
+                             f"${bounds[k_hi]:.2f}")
                 with col3:
                     st.metric("95% Confidence Lower Bound",
-                             f"${np.percentile(final_prices, 5):.2f}")
+                             f"${bounds[k_lo]:.2f}")
                 
         except Exception as e:
             st.error(f"Error loading data: {str(e)}")
@@ -291,7 +418,9 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-from sklearn.preprocessing import MinMaxScaler
+
+# One PCG64 generator for the whole app; draw in bulk, never per sample
+_rng = np.random.default_rng()
 
 class PortfolioAnalyzer:
     def __init__(self):
@@ -325,26 +454,25 @@ class PortfolioAnalyzer:
             )
             self.weights.append(weight/100)
 
-@st.cache_data
+@st.cache_data(ttl=300)
 def fetch_data(tickers, period):
-    data = pd.DataFrame()
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)['Close']
-        data[ticker] = hist
+    # One batched request for every ticker instead of one per ticker
+    raw = yf.download(tickers, period=period, group_by='ticker',
+                      threads=True, progress=False, auto_adjust=True)
+    data = pd.concat({t: raw[t]['Close'] for t in tickers}, axis=1).astype('float32')
     return data
 
 @st.cache_data
-def calculate_portfolio_metrics(data, weights):
+def calculate_portfolio_metrics(data, weights, cov_matrix):
     # Returns
     returns = data.pct_change()
     
     # Portfolio Return
     portfolio_return = np.sum(returns.mean() * weights) * 252
     
-    # Portfolio Volatility
+    # Portfolio Volatility (cov_matrix is the annualized covariance)
     portfolio_vol = np.sqrt(
-        np.dot(weights, np.dot(returns.cov() * 252, weights))
+        np.dot(weights, np.dot(cov_matrix, weights))
     )
     
     # Sharpe Ratio (assuming rf=0.02)
@@ -364,17 +492,19 @@ def calculate_portfolio_metrics(data, weights):
     }
 
 def create_correlation_heatmap(returns):
-    corr_matrix = returns.corr().round(2)
+    # One BLAS-backed call instead of pandas' per-pair loop
+    corr_matrix = np.corrcoef(returns.dropna().to_numpy(), rowvar=False).round(2)
     
     fig = go.Figure(data=go.Heatmap(
         z=corr_matrix,
-        x=corr_matrix.columns,
-        y=corr_matrix.columns,
-        text=corr_matrix.values,
+        x=returns.columns,
+        y=returns.columns,
+        text=corr_matrix,
         texttemplate='%{text:.2f}',
         textfont={"size": 10},
         hoverongaps=False,
         colorscale='RdBu_r',
+        zsmooth=False,
         zmin=-1,
         zmax=1
     ))
@@ -387,32 +517,26 @@ def create_correlation_heatmap(returns):
     
     return fig
 
-def create_efficient_frontier(returns, n_portfolios=1000):
+def create_efficient_frontier(returns, cov_matrix, n_portfolios=1000):
     n_assets = returns.shape[1]
-    returns_array = returns.mean() * 252
-    cov_matrix = returns.cov() * 252
+    returns_array = (returns.mean() * 252).to_numpy()
     
-    portfolios_returns = []
-    portfolios_vols = []
+    # All random portfolios at once: one row of weights per portfolio
+    W = _rng.random((n_portfolios, n_assets))
+    W /= W.sum(axis=1, keepdims=True)
     
-    for _ in range(n_portfolios):
-        weights = np.random.random(n_assets)
-        weights = weights / np.sum(weights)
-        
-        portfolio_return = np.sum(returns_array * weights)
-        portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
-        
-        portfolios_returns.append(portfolio_return)
-        portfolios_vols.append(portfolio_vol)
+    portfolios_returns = W @ returns_array
+    # Batched quadratic form w^T cov w for every row of W
+    portfolios_vols = np.sqrt(np.einsum('ij,jk,ik->i', W, cov_matrix, W))
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=portfolios_vols,
         y=portfolios_returns,
         mode='markers',
         marker=dict(
             size=5,
-            color=np.array(portfolios_returns)/np.array(portfolios_vols),
+            color=portfolios_returns/portfolios_vols,
             colorscale='Viridis',
             showscale=True
         ),
@@ -437,13 +561,15 @@ class PortfolioApp:
         
         try:
             # Fetch Data
-            data = fetch_data(self.analyzer.tickers, self.analyzer.period)
+            data = fetch_data(tuple(self.analyzer.tickers), self.analyzer.period)
             
             # Calculate returns
             returns = data.pct_change().dropna()
+            # Annualized covariance, shared by metrics, frontier and risk contribution
+            cov_matrix = np.cov(returns.to_numpy(), rowvar=False) * 252
             
             # Portfolio Metrics
-            metrics = calculate_portfolio_metrics(data, self.analyzer.weights)
+            metrics = calculate_portfolio_metrics(data, self.analyzer.weights, cov_matrix)
             
             # Display Metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -470,8 +596,11 @@ class PortfolioApp:
             
             # Price Evolution
             st.subheader("Price Evolution")
+            arr = data.to_numpy()
+            mn = np.nanmin(arr, axis=0)
+            rng_ = np.nanmax(arr, axis=0) - mn
             scaled_data = pd.DataFrame(
-                MinMaxScaler().fit_transform(data),
+                (arr - mn) / rng_,
                 columns=data.columns,
                 index=data.index
             )
@@ -485,7 +614,7 @@ class PortfolioApp:
             
             # Efficient Frontier
             st.subheader("Portfolio Optimization")
-            ef_fig = create_efficient_frontier(returns)
+            ef_fig = create_efficient_frontier(returns, cov_matrix)
             st.plotly_chart(ef_fig, use_container_width=True)
             
             # Rolling Statistics
@@ -506,7 +635,7 @@ class PortfolioApp:
             
             # Risk Contribution
             risk_contrib = (self.analyzer.weights * 
-                          (np.dot(returns.cov() * 252, self.analyzer.weights))) / metrics['volatility']
+                          (np.dot(cov_matrix, self.analyzer.weights))) / metrics['volatility']
             
             st.subheader("Risk Contribution Analysis")
             fig_risk = px.pie(
@@ -531,6 +660,7 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 class SectorAnalysis:
     def __init__(self):
@@ -567,33 +697,30 @@ class SectorAnalysis:
         self.show_performance = st.sidebar.checkbox("Show Performance", True)
         self.show_volatility = st.sidebar.checkbox("Show Volatility", True)
 
-@st.cache_data
+@st.cache_data(ttl=300)
 def fetch_sector_data(tickers, period):
     """Fetch data for entire sector"""
-    data = pd.DataFrame()
-    stock_info = {}
+    # Get historical data for every ticker in one batched request
+    raw = yf.download(tickers, period=period, group_by='ticker',
+                      threads=True, progress=False, auto_adjust=True)
+    data = pd.concat({t: raw[t]['Close'] for t in tickers}, axis=1)
     
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        # Get historical data
-        hist = stock.history(period=period)['Close']
-        data[ticker] = hist
-        # Get stock info
-        stock_info[ticker] = {
-            'marketCap': stock.info.get('marketCap', 0),
-            'peRatio': stock.info.get('peRatio', 0),
-            'forwardPE': stock.info.get('forwardPE', 0),
-            'dividendYield': stock.info.get('dividendYield', 0),
-            'beta': stock.info.get('beta', 0),
-            'volume': stock.info.get('volume', 0)
-        }
+    def _fetch_info(ticker):
+        # Get stock info (a single .info access per ticker)
+        info = yf.Ticker(ticker).info
+        fields = ('marketCap', 'peRatio', 'forwardPE', 'dividendYield', 'beta', 'volume')
+        return ticker, {k: info.get(k, 0) for k in fields}
+    
+    # There is no batched info endpoint: fetch it concurrently per ticker
+    with ThreadPoolExecutor(max_workers=min(16, len(tickers))) as executor:
+        futures = {executor.submit(_fetch_info, t): t for t in tickers}
+        results = dict(future.result() for future in as_completed(futures))
     
+    stock_info = {t: results[t] for t in tickers}
     return data, stock_info
 
-def calculate_sector_metrics(data, stock_info):
+def calculate_sector_metrics(returns, stock_info):
     """Calculate key sector metrics"""
-    returns = data.pct_change()
-    
     metrics = {
         'daily_returns': returns.mean(),
         'volatility': returns.std() * np.sqrt(252),
@@ -611,7 +738,7 @@ def create_performance_chart(data):
     
     fig = go.Figure()
     for col in normalized.columns:
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=normalized.index,
             y=normalized[col],
             name=col,
@@ -697,8 +824,11 @@ class SectorApp:
                 self.analyzer.period
             )
             
+            # Compute returns once and share them across the views
+            returns = data.pct_change()
+            
             # Calculate metrics
-            metrics = calculate_sector_metrics(data, stock_info)
+            metrics = calculate_sector_metrics(returns, stock_info)
             
             # Display sector overview
             st.subheader("Sector Overview")
@@ -747,21 +877,22 @@ class SectorApp:
             # Volatility Analysis
             if self.analyzer.show_volatility:
                 st.subheader("Volatility Analysis")
-                vol_fig = create_volatility_surface(data.pct_change().dropna())
+                vol_fig = create_volatility_surface(returns.dropna())
                 st.plotly_chart(vol_fig, use_container_width=True)
             
             # Correlation Analysis
             st.subheader("Correlation Analysis")
-            corr_matrix = data.pct_change().corr().round(2)
+            corr_matrix = np.corrcoef(returns.dropna().to_numpy(), rowvar=False).round(2)
             
             fig = go.Figure(data=go.Heatmap(
                 z=corr_matrix,
-                x=corr_matrix.columns,
-                y=corr_matrix.columns,
-                text=corr_matrix.values,
+                x=returns.columns,
+                y=returns.columns,
+                text=corr_matrix,
                 texttemplate='%{text:.2f}',
                 textfont={"size": 10},
                 colorscale='RdBu_r',
+                zsmooth=False,
                 zmin=-1,
                 zmax=1
             ))
@@ -823,6 +954,9 @@ YOU MUST USE THE ABOVE CODE AS A REFERENCE AND MUST NOT BREAK IT. AND DO NOW USE
         description="Port number for the Streamlit server"
     )
 
+# Helper module the generated Streamlit apps may import (see _PROMPT_TMPL)
+INDICATORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_indicators.py")
+
 PYTHON_TEMPLATES = {
     "python-finance": {
         "name": "Python Finance Dashboard",
@@ -839,8 +973,8 @@ PYTHON_TEMPLATES = {
     }
 }
 
-def create_prompt_template(user_story: str, software_requirements: str, features: str, key_details: str) -> str:
-    system_prompt = f'''
+# Parsed once; the request fields and the per-call instruction are filled in at invoke time
+_PROMPT_TMPL = ChatPromptTemplate.from_template('''
     You are a world-class Python developer specializing in financial dashboards and data visualization.
     
     Requirements:
@@ -866,23 +1000,200 @@ def create_prompt_template(user_story: str, software_requirements: str, features
     IMPORTANT: AVOID THIS ERROR AT ALL COSTS: Error fetching data: 'Adj Close'
     Ensure that the code is working fully and there are no errors.
 
-    '''
-    return system_prompt
+    PERFORMANCE REQUIREMENTS:
+    - For weighted moving averages (WMA, HMA, KAMA, etc.) use the provided helper instead of `.rolling().apply(lambda ...)`:
+      `from _indicators import sliding_weighted_ma`; `sliding_weighted_ma(values, weights)` returns a NaN-padded array the same length as `values`.
+    - If `.rolling().apply` is unavoidable, always pass `raw=True`.
 
-def review_code_for_infinite_loops(code):
-    class ErrorChecker(BaseModel):
-        has_error: bool = Field(description="Whether the code has an error")
-        fix: str = Field(description="Instructions to fix the error")
-    
-    model = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.0, max_tokens=7000)
-    structured_llm = model.with_structured_output(ErrorChecker)
-    chain = ChatPromptTemplate.from_template("""
+    {prompt}
+    ''')
+
+_REVIEW_TEMPLATE = ChatPromptTemplate.from_template("""
     You are a world-class Python developer specializing in financial dashboards.
     Your task: Review the code for infinite loops or anything that may cause errors.
     Make sure there are no errors regarding keys, data frames, or anything else that may cuase errors.
                                                                                     
-    Code: {code}""") | structured_llm
-    return chain.invoke({"code": code})
+    Code: {code}""")
+
+class ErrorChecker(BaseModel):
+    has_error: bool = Field(description="Whether the code has an error")
+    fix: str = Field(description="Instructions to fix the error")
+
+@functools.lru_cache(maxsize=1)
+def _reviewer():
+    model = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.0, max_tokens=7000)
+    return model.with_structured_output(ErrorChecker)
+
+@functools.lru_cache(maxsize=1)
+def _review_chain():
+    return _REVIEW_TEMPLATE | _reviewer()
+
+# Reviews keyed by the SHA-256 of the rendered code, most recently used last
+_REVIEW_CACHE_SIZE = 256
+_review_cache = OrderedDict()
+_review_cache_lock = threading.Lock()
+
+def review_code_for_infinite_loops(code):
+    text = code if isinstance(code, str) else str(code)
+    key = hashlib.sha256(text.encode("utf-8")).digest()
+    with _review_cache_lock:
+        if key in _review_cache:
+            _review_cache.move_to_end(key)
+            return _review_cache[key]
+
+    result = _review_chain().invoke({"code": code})
+    with _review_cache_lock:
+        _review_cache[key] = result
+        if len(_review_cache) > _REVIEW_CACHE_SIZE:
+            _review_cache.popitem(last=False)
+    return result
+
+# Generated code that mentions Streamlit is served locally instead of in Pyodide
+_ST_RE = re.compile(r"streamlit", re.I)
+_INDICATORS_RE = re.compile(r"\b_indicators\b")
+
+@functools.lru_cache(maxsize=1)
+def _pyodide_indicators_prelude() -> str:
+    """Code that registers the _indicators helper module inside the sandbox, which has no file I/O."""
+    src = Path(INDICATORS_PATH).read_text(encoding="utf-8")
+    return (
+        "import sys, types\n"
+        "import numpy\n"
+        "_m = types.ModuleType('_indicators')\n"
+        f"exec({src!r}, _m.__dict__)\n"
+        "sys.modules['_indicators'] = _m\n"
+        "del _m\n"
+    )
+
+# Enforce a 5-minute timeout on Pyodide execution
+PYODIDE_TIMEOUT = 300
+
+_SANDBOX = None
+_SANDBOX_LOCK = threading.Lock()
+
+def _get_sandbox():
+    """Process-wide PyodideSandbox, created on first use."""
+    global _SANDBOX
+    with _SANDBOX_LOCK:
+        if _SANDBOX is None:
+            # Imported lazily: only the non-Streamlit path needs Pyodide/Deno
+            from langchain_sandbox import PyodideSandbox
+
+            _SANDBOX = PyodideSandbox(stateful=True, allow_net=True)
+        return _SANDBOX
+
+async def _run_sandbox(sandbox, code: str):
+    # A timeout context avoids the extra Task that asyncio.wait_for creates
+    if async_timeout is None:
+        return await asyncio.wait_for(sandbox.execute(code), timeout=PYODIDE_TIMEOUT)
+    async with async_timeout(PYODIDE_TIMEOUT):
+        return await sandbox.execute(code)
+
+@functools.lru_cache(maxsize=1)
+def _get_structured_llm():
+    llm = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.0, max_tokens=8192)
+    return llm.with_structured_output(FragmentSchema)
+
+@functools.lru_cache(maxsize=1)
+def _get_chain():
+    return _PROMPT_TMPL | _get_structured_llm()
+
+def _is_fatal(e: Exception) -> bool:
+    """Errors a retry cannot fix: rejected requests, bad credentials, invalid output."""
+    if isinstance(e, ValidationError):
+        return True
+    try:
+        import anthropic
+    except ImportError:
+        return False
+    return isinstance(e, (anthropic.BadRequestError, anthropic.AuthenticationError))
+
+def _wait_for_server(port: int, timeout: float = 60.0) -> bool:
+    """Wait up to `timeout` seconds for a local HTTP server on `port`.
+
+    Probes with a cheap TCP connect and exponential backoff (10 ms to 500 ms),
+    and only issues an HTTP request once the port accepts connections.
+    """
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    with requests.Session() as session:
+        while time.monotonic() < deadline:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(0.2)
+                listening = s.connect_ex(("127.0.0.1", port)) == 0
+            if listening:
+                try:
+                    if session.get(url, timeout=1.5).status_code < 500:
+                        return True
+                except requests.exceptions.RequestException:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 1.7, 0.5)
+    return False
+
+# Auto-shutdown delay for locally launched Streamlit apps
+STREAMLIT_TTL = 300
+
+# Run each app in its own process group so its children are terminated with it
+if os.name == "nt":
+    _POPEN_GROUP_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _POPEN_GROUP_KWARGS = {"start_new_session": True}
+
+def _terminate_proc(proc: subprocess.Popen):
+    # A live leader guarantees its pid is still our process group (pgid == pid
+    # under start_new_session), so an exited app never has its pid re-targeted
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(proc.pid, signal.SIGTERM)
+    except Exception:
+        pass
+
+class _ProcReaper:
+    """One daemon thread that terminates scheduled processes at their deadline."""
+
+    def __init__(self):
+        self._heap = []  # (deadline, seq, Popen)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        # Apps run in their own session, so Ctrl+C on the host never reaches them
+        atexit.register(self.terminate_all)
+
+    def schedule(self, proc: subprocess.Popen, deadline: float):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, proc))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="streamlit-reaper", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def terminate_all(self):
+        with self._cond:
+            pending, self._heap = self._heap, []
+        for _, _, proc in pending:
+            _terminate_proc(proc)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                deadline, _, proc = self._heap[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            _terminate_proc(proc)
+
+_reaper = _ProcReaper()
 
 class GeneratorResult(TypedDict):
     url: str
@@ -894,23 +1205,26 @@ def generate_python_dashboard(user_story: str, software_requirements: str, featu
     """Generate a Python financial dashboard using Streamlit."""
     try:
         template = PYTHON_TEMPLATES.get("python-finance")
-        system_prompt = create_prompt_template(user_story, software_requirements, features, key_details)
-        
-        prompt_template = ChatPromptTemplate.from_template(system_prompt)
-        llm = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.0, max_tokens=8192)
-        structured_llm = llm.with_structured_output(FragmentSchema)
-        chain = prompt_template | structured_llm
+        chain = _get_chain()
+        request_vars = {
+            "user_story": user_story,
+            "software_requirements": software_requirements,
+            "features": features,
+            "key_details": key_details,
+        }
         
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 fragment = chain.invoke({
+                    **request_vars,
                     "prompt": f"Generate a Python/Streamlit dashboard for: {user_story}, {software_requirements}, {features}, {key_details}. Use the example code from the FragmentSchema as a reference, DO NOT USE ANY THING THAT IS NOT REFERENCED FROM THE EXAMPLE CODE."
                 })
                 
                 review_result = review_code_for_infinite_loops(fragment.code)
                 if review_result.has_error:
                     fragment = chain.invoke({
+                        **request_vars,
                         "prompt": f'''Generate a Python/Streamlit dashboard for: {user_story}. Important: {review_result.fix} make sure this error is avoided: streamlit.runtime.caching.cache_errors.UnhashableParamError: Cannot hash argument 'self' (of type __main__.StockAnalysisDashboard) in 'fetch_stock_data'.
 
 To address this, you can tell Streamlit not to hash this argument by adding a leading underscore to the argument's name in the function signature:
@@ -950,17 +1264,24 @@ File "/usr/local/lib/python3.10/dist-packages/streamlit/runtime/caching/hashing.
                     })
                 break
             except Exception as e:
-                if attempt == max_retries - 1:
+                if attempt == max_retries - 1 or _is_fatal(e):
                     raise
-                time.sleep(1)
+                logger.warning("Dashboard generation attempt %d failed, retrying: %s", attempt + 1, e)
+                time.sleep(min(2.0, 0.25 * (2 ** attempt)) + random.uniform(0, 0.1))
+
+        # Resolve fragment attributes once
+        code_is_list = isinstance(fragment.code, list)
+        target_file = getattr(fragment, "file_path", "app.py")
+        start_port = getattr(fragment, "port", None) or 8501
+        code_str = "\n".join(file_item.file_content for file_item in fragment.code) if code_is_list else fragment.code
 
         # If the generated code does NOT use Streamlit, try executing it in Pyodide Sandbox
-        code_str = fragment.code if isinstance(fragment.code, str) else "\n".join([file_item.file_content for file_item in fragment.code])
-        if "streamlit" not in code_str.lower():
+        if _ST_RE.search(code_str) is None:
             try:
-                sandbox = PyodideSandbox(stateful=True, allow_net=True)
-                # Enforce a 5-minute timeout on Pyodide execution
-                exec_result = asyncio.run(asyncio.wait_for(sandbox.execute(code_str), timeout=300))
+                sandbox_code = code_str
+                if _INDICATORS_RE.search(code_str):
+                    sandbox_code = _pyodide_indicators_prelude() + code_str
+                exec_result = asyncio.run(_run_sandbox(_get_sandbox(), sandbox_code))
                 # Return sandbox execution result (no URL, just outputs)
                 return GeneratorResult(
                     url="pyodide://sandbox",  # logical placeholder
@@ -975,35 +1296,38 @@ File "/usr/local/lib/python3.10/dist-packages/streamlit/runtime/caching/hashing.
         work_dir = tempfile.mkdtemp(prefix="st_dashboard_")
 
         # Resolve target file path
-        target_file = fragment.file_path if hasattr(fragment, "file_path") else "app.py"
         target_path = os.path.join(work_dir, target_file)
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
 
         # Write code to disk
-        if isinstance(fragment.code, list):
-            for file_item in fragment.code:
-                abs_path = os.path.join(work_dir, file_item.file_path)
-                os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-                with open(abs_path, "w", encoding="utf-8") as f:
-                    f.write(file_item.file_content)
+        if code_is_list:
+            def _write_one(file_item):
+                abs_path = Path(work_dir, file_item.file_path)
+                abs_path.parent.mkdir(parents=True, exist_ok=True)
+                abs_path.write_text(file_item.file_content, encoding="utf-8")
+
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(fragment.code)))) as ex:
+                list(ex.map(_write_one, fragment.code))
         else:
-            with open(target_path, "w", encoding="utf-8") as f:
-                f.write(fragment.code)
+            Path(target_path).write_text(code_str, encoding="utf-8")
 
-        # Find an available port starting from fragment.port or default 8501
-        start_port = getattr(fragment, "port", None) or 8501
+        # Ship the vectorized indicator helpers next to the generated entrypoint,
+        # whose directory Streamlit puts on sys.path
+        shutil.copy2(INDICATORS_PATH, os.path.join(os.path.dirname(target_path), "_indicators.py"))
 
-        def find_free_port(start: int, attempts: int = 50) -> int:
-            for i in range(attempts):
-                candidate = start + i
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                    try:
-                        s.bind(("127.0.0.1", candidate))
-                        return candidate
-                    except OSError:
-                        continue
-            return start
+        # Find an available port starting from fragment.port or default 8501
+        def find_free_port(start: int) -> int:
+            # Prefer the requested port; otherwise let the kernel pick one
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                try:
+                    s.bind(("127.0.0.1", start))
+                    return start
+                except OSError:
+                    pass
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(("127.0.0.1", 0))
+                return s.getsockname()[1]
 
         port = find_free_port(start_port)
 
@@ -1020,17 +1344,12 @@ File "/usr/local/lib/python3.10/dist-packages/streamlit/runtime/caching/hashing.
             proc = subprocess.Popen(
                 cmd,
                 cwd=work_dir,
-                env=os.environ.copy(),
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                **_POPEN_GROUP_KWARGS
             )
             # Auto-shutdown the Streamlit process after 5 minutes
-            def _terminate_proc(pid: int):
-                try:
-                    os.kill(pid, signal.SIGTERM)
-                except Exception:
-                    pass
-            threading.Timer(300, _terminate_proc, args=[proc.pid]).start()
+            _reaper.schedule(proc, time.monotonic() + STREAMLIT_TTL)
         except FileNotFoundError as e:
             # streamlit not installed
             logger.error("Streamlit CLI not found. Please install it (pip install streamlit).")
@@ -1038,16 +1357,7 @@ File "/usr/local/lib/python3.10/dist-packages/streamlit/runtime/caching/hashing.
 
         # Wait for the server to be reachable
         local_url = f"http://127.0.0.1:{port}"
-        ready = False
-        for _ in range(60):  # up to ~60 seconds
-            try:
-                resp = requests.get(local_url, timeout=1.5)
-                if resp.status_code < 500:
-                    ready = True
-                    break
-            except requests.exceptions.RequestException:
-                pass
-            time.sleep(1)
+        ready = _wait_for_server(port)
 
         if not ready:
             logger.error("Streamlit app failed to start within timeout.")
@@ -1055,7 +1365,7 @@ File "/usr/local/lib/python3.10/dist-packages/streamlit/runtime/caching/hashing.
 
         return GeneratorResult(
             url=local_url,
-            code=fragment.code if isinstance(fragment.code, str) else "\n".join([file_item.file_content for file_item in fragment.code]),
+            code=code_str,
             sbxId="local"
         )
         
@@ -1,14 +1,59 @@
+import asyncio
 import streamlit as st
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import AIMessageChunk, SystemMessage, HumanMessage
 from core.agent import create_agent
 from core.prompts import SYSTEM_PROMPT
 from utils.display import display_message
 
+def _chunk_text(chunk) -> str:
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(
+        block.get("text", "")
+        for block in chunk.content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+def _iter_async(agen):
+    """Drive an async generator from sync code (st.write_stream) on a private loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+async def _stream_agent(agent, messages, tool_messages):
+    # Yield LLM tokens as they arrive; tool results are rendered after the stream.
+    # Token chunks are already deltas; tool messages are kept once per id so a
+    # re-emitted message is never rendered twice. Tools are sync; under astream
+    # the ToolNode runs them in a worker thread.
+    seen_ids = set()
+    async for chunk, metadata in agent.astream(messages, stream_mode="messages"):
+        if isinstance(chunk, AIMessageChunk):
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+        elif metadata.get("langgraph_node") == "tools":
+            if chunk.id is not None:
+                if chunk.id in seen_ids:
+                    continue
+                seen_ids.add(chunk.id)
+            tool_messages.append(chunk)
+
+@st.cache_resource
+def _get_agent():
+    # The compiled graph has no checkpointer, so one instance serves every session
+    return create_agent()
+
 def init_streamlit_app():
     st.title("PowerPoint Presentation Generator")
-    
-    if "agent" not in st.session_state:
-        st.session_state.agent = create_agent()
+    agent = _get_agent()
 
     if prompt := st.chat_input("What kind of presentation would you like to create?"):
         messages = [
@@ -17,9 +62,11 @@ def init_streamlit_app():
         ]
         
         with st.spinner("Creating your presentation..."):
-            for message in st.session_state.agent.stream(messages):
-                st.write(message)
+            tool_messages = []
+            st.write_stream(_iter_async(_stream_agent(agent, messages, tool_messages)))
+            for message in tool_messages:
+                # display_message is the only renderer; raw dumps are opt-in for debugging
+                if st.session_state.get("debug"):
+                    st.json(message.model_dump())
                 display_message(message)
-                if "end" in message:
-                    st.write(message)
             
\ No newline at end of file
@@ -1,34 +1,71 @@
 import os
+import json
+import logging
 import streamlit as st
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, ToolMessage
 from core.messages import RichToolMessage
 
+logger = logging.getLogger(__name__)
+
+def _tool_output(message: ToolMessage):
+    """The tool's dict result: RichToolMessage.raw_output, the artifact, or ToolNode's JSON content."""
+    if isinstance(message, RichToolMessage):
+        return message.raw_output
+    if isinstance(message.artifact, dict):
+        return message.artifact
+    if isinstance(message.content, str):
+        try:
+            parsed = json.loads(message.content)
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+    return None
+
+def _render_download_buttons(paths):
+    # Lay the buttons out in one row of up to four columns
+    cols = st.columns(min(len(paths), 4))
+    for i, path in enumerate(paths):
+        name = os.path.basename(path)
+        logger.debug("Creating download button for: %s", path)
+        with cols[i % len(cols)]:
+            try:
+                with open(path, 'rb') as f:
+                    # Hand Streamlit the file object rather than a bytes copy of it
+                    st.download_button(
+                        label=f"Download {name}",
+                        data=f,
+                        file_name=name,
+                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+                    )
+                    logger.debug("Download button created successfully for %s", path)
+            except Exception as e:
+                logger.error("Error creating download button: %s", e)
+                st.error(f"Error loading file {path}: {str(e)}")
+
 def display_message(message: BaseMessage):
-    print(f"\nDisplaying message of type: {type(message)}")
+    logger.debug("Displaying message of type: %s", type(message))
     if isinstance(message, AIMessage):
         st.write("AI: ", message.content)
-        print(f"AI Message: {message.content}")
+        logger.debug("AI Message: %s", message.content)
     elif isinstance(message, HumanMessage):
         st.write("Human: ", message.content)
-        print(f"Human Message: {message.content}")
-    elif isinstance(message, RichToolMessage):
-        print("Processing RichToolMessage")
-        if message.raw_output.get("results"):
-            for result in message.raw_output["results"]:
-                if isinstance(result, dict) and result.get("type") == "pptx_files":
-                    for path in result["local_paths"]:
-                        print(f"Creating download button for: {path}")
-                        try:
-                            with open(path, 'rb') as f:
-                                file_data = f.read()
-                                st.download_button(
-                                    label=f"Download {os.path.basename(path)}",
-                                    data=file_data,
-                                    file_name=os.path.basename(path),
-                                    mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                                )
-                                print(f"Download button created successfully for {path}")
-                        except Exception as e:
-                            print(f"Error creating download button: {str(e)}")
-                            st.error(f"Error loading file {path}: {str(e)}")
-    
\ No newline at end of file
+        logger.debug("Human Message: %s", message.content)
+    elif isinstance(message, ToolMessage):
+        logger.debug("Processing %s", type(message).__name__)
+        raw_output = _tool_output(message)
+        if raw_output is None:
+            # Errors and plain-text results
+            st.write(message.content)
+            return
+        for result in raw_output.get("results") or []:
+            if isinstance(result, dict) and result.get("type") == "pptx_files" and result.get("local_paths"):
+                _render_download_buttons(result["local_paths"])
+        if raw_output.get("url"):
+            st.markdown(f"Dashboard running at: {raw_output['url']}")
+        if raw_output.get("code"):
+            with st.expander("Generated code"):
+                st.code(raw_output["code"], language="python")
+        if raw_output.get("stdout"):
+            st.code(raw_output["stdout"], language="text")
+        if raw_output.get("stderr"):
+            st.code(raw_output["stderr"], language="text")